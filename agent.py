@@ -4,8 +4,15 @@ The Claude LLM reasoning layer.
 Takes the aggregated platform snapshot and produces a structured
 health report with narrative, anomaly flags, and prioritised actions.
 """
+from __future__ import annotations
+
+import copy
+import hashlib
 import json
 import logging
+import re
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Any
 
@@ -13,10 +20,40 @@ import anthropic
 
 from config import settings
 
+try:
+    import orjson
+except ImportError:  # orjson is optional — fall back to the stdlib encoder
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+_JSON_DECODE_ERRORS = (json.JSONDecodeError,) if orjson is None else (json.JSONDecodeError, orjson.JSONDecodeError)
+
 client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
 
+_CHARS_PER_TOKEN = 4
+
+# Trimmable list items sit at snapshot → sources → source → list, i.e. 4 levels of 2-space indent
+_ITEM_INDENT = 8
+
+# A reply wrapped in a ```json ... ``` markdown fence
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+# Recent snapshot hash → (cached at, report), so an unchanged platform doesn't cost
+# another Claude call. Entries expire after settings.report_cache_ttl seconds.
+_REPORT_CACHE: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+_REPORT_CACHE_SIZE = 8
+_last_overall_status: str | None = None
+
+# Snapshot lists the prompt budget may shorten, as (source, key)
+_TRIMMABLE_LISTS = (
+    ("azure_ml", "completed_jobs"),
+    ("azure_ml", "failed_jobs"),
+    ("azure_monitor", "warning_alerts"),
+    ("jira", "open_tickets"),
+    ("jira", "resolved_last_24h"),
+)
+
 SYSTEM_PROMPT = """
 You are an expert ML Platform Health Agent for an enterprise retail organisation.
 You have deep knowledge of MLOps, Azure ML, Azure Monitor, and platform reliability engineering.
@@ -68,44 +105,76 @@ def analyse(snapshot: dict[str, Any]) -> dict[str, Any]:
     """
     Send the platform snapshot to Claude and get back a structured health report.
     """
+    now_iso = datetime.now(timezone.utc).isoformat()
+    lean_snapshot = _token_budget_trim(snapshot, settings.claude_prompt_token_budget)
+
+    cache_key = _cache_key(lean_snapshot) if settings.enable_report_cache else None
+    report = _cached_report(cache_key, snapshot.get("overall_status"))
+    if report is not None:
+        report["generated_at"] = now_iso
+        report["snapshot_collected_at"] = snapshot.get("collected_at")
+        logger.info("Snapshot unchanged since a recent run — reusing cached analysis.")
+        return report
+
     logger.info("Sending snapshot to Claude for analysis...")
 
-    prompt = _build_prompt(snapshot)
+    prompt = _build_prompt(snapshot, lean_snapshot)
 
     try:
-        response = client.messages.create(
-            model=settings.claude_model,
-            max_tokens=4096,
-            system=SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        raw = response.content[0].text.strip()
+        raw = _stream_reply(prompt)
 
         # Strip accidental markdown fences if present
-        if raw.startswith("```"):
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-        raw = raw.strip()
-
-        report = json.loads(raw)
-        report["generated_at"] = datetime.now(timezone.utc).isoformat()
+        m = _FENCE_RE.match(raw)
+        raw = m.group(1) if m else raw.strip()
+
+        report = _loads(raw)
+        report["generated_at"] = now_iso
         report["snapshot_collected_at"] = snapshot.get("collected_at")
 
+        if cache_key is not None:
+            _REPORT_CACHE[cache_key] = (time.monotonic(), copy.deepcopy(report))
+            if len(_REPORT_CACHE) > _REPORT_CACHE_SIZE:
+                _REPORT_CACHE.popitem(last=False)
+
         logger.info(f"Agent analysis complete. Status: {report.get('overall_status', 'unknown').upper()}")
         return report
 
-    except json.JSONDecodeError as e:
+    except _JSON_DECODE_ERRORS as e:
         logger.error(f"Claude returned invalid JSON: {e}")
-        return _fallback_report(snapshot, f"JSON parse error: {e}")
+        return _fallback_report(snapshot, f"JSON parse error: {e}", now_iso)
     except Exception as e:
         logger.error(f"Agent analysis failed: {e}")
-        return _fallback_report(snapshot, str(e))
+        return _fallback_report(snapshot, str(e), now_iso)
+
+
+def _stream_reply(prompt: str) -> str:
+    """
+    Stream Claude's reply as it is generated.
+    Gives up as soon as the reply is clearly not JSON instead of waiting for all 4096 tokens.
+    """
+    chunks: list[str] = []
+    checked = False
+    with client.messages.stream(
+        model=settings.claude_model,
+        max_tokens=4096,
+        system=SYSTEM_PROMPT,
+        messages=[{"role": "user", "content": prompt}],
+    ) as stream:
+        for text in stream.text_stream:
+            chunks.append(text)
+            if not checked:
+                head = "".join(chunks).lstrip()
+                if head:
+                    # A JSON object, possibly wrapped in a markdown fence
+                    if head[0] not in "{`":
+                        raise ValueError(f"Claude reply is not JSON: {head[:80]!r}")
+                    checked = True
+
+    return "".join(chunks).strip()
 
 
-def _build_prompt(snapshot: dict) -> str:
-    """Build the user prompt from the snapshot."""
+def _build_prompt(snapshot: dict, lean_snapshot: dict) -> str:
+    """Build the user prompt from the snapshot and its budget-trimmed copy."""
     facts = snapshot.get("quick_facts", {})
     collected_at = snapshot.get("collected_at", "unknown")
     overall = snapshot.get("overall_status", "unknown")
@@ -125,26 +194,112 @@ QUICK FACTS:
 FULL DATA:
 """.strip()
 
-    # Serialize full snapshot — keep it lean by truncating large lists
-    lean_snapshot = _trim_snapshot(snapshot)
-    data = json.dumps(lean_snapshot, indent=2, default=str)
+    data = _dumps(lean_snapshot)
 
     return f"{header}\n\n{data}"
 
 
-def _trim_snapshot(snapshot: dict) -> dict:
-    """Trim large lists to keep the prompt within token limits."""
-    import copy
-    s = copy.deepcopy(snapshot)
+def _dumps(obj: Any) -> str:
+    """Serialise to indented JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY,
+            default=str,
+        ).decode()
+    return json.dumps(obj, indent=2, default=str)
 
-    ml = s.get("sources", {}).get("azure_ml", {})
-    # Keep full failed jobs, trim completed
-    ml["completed_jobs"] = ml.get("completed_jobs", [])[:5]
 
+def _loads(raw: str) -> Any:
+    """Parse JSON text, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(raw.encode())
+    return json.loads(raw)
+
+
+def _cached_report(cache_key: str | None, overall_status: str | None) -> dict | None:
+    """Return a copy of the cached report for cache_key if it is still within its TTL."""
+    global _last_overall_status
+    if overall_status != _last_overall_status:
+        # Platform status moved since the last run — drop everything cached before the change
+        _REPORT_CACHE.clear()
+        _last_overall_status = overall_status
+
+    if cache_key not in _REPORT_CACHE:
+        return None
+    cached_at, report = _REPORT_CACHE[cache_key]
+    if time.monotonic() - cached_at >= settings.report_cache_ttl:
+        del _REPORT_CACHE[cache_key]
+        return None
+    _REPORT_CACHE.move_to_end(cache_key)
+    return copy.deepcopy(report)
+
+
+def _cache_key(lean_snapshot: dict) -> str:
+    """Hash the snapshot content, ignoring the collection timestamps that change every run."""
+    content = {k: v for k, v in lean_snapshot.items() if k != "collected_at"}
+    content["sources"] = {
+        name: {k: v for k, v in src.items() if k != "collected_at"}
+        for name, src in lean_snapshot.get("sources", {}).items()
+    }
+    if orjson is not None:
+        encoded = orjson.dumps(content, option=orjson.OPT_SORT_KEYS | orjson.OPT_NAIVE_UTC, default=str)
+    else:
+        encoded = json.dumps(content, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def _token_budget_trim(snapshot: dict, max_tokens: int = 12000) -> dict:
+    """
+    Trim the largest lists in the snapshot until it fits within max_tokens.
+    Lists are newest-first, so items are dropped from the tail to keep recent entries.
+    """
+    # Shallow-copy only the dicts we mutate — the caller's snapshot is left untouched
+    s = {**snapshot}
+    sources = s["sources"] = {**snapshot.get("sources", {})}
+
+    max_chars = max_tokens * _CHARS_PER_TOKEN
+    total = len(_dumps(s))
+    if total <= max_chars:
+        return s
+
+    # Costs are in characters of the rendered snapshot, so total stays exact as items are popped
+    costs: dict[tuple[str, str], list[int]] = {}
+    for src, key in _TRIMMABLE_LISTS:
+        items = sources.get(src, {}).get(key)
+        if not items:
+            continue
+        if sources[src] is snapshot["sources"][src]:
+            sources[src] = {**sources[src]}
+        sources[src][key] = list(items)
+        costs[(src, key)] = [_rendered_chars(i) for i in items]
+
+    totals = {k: sum(v) for k, v in costs.items()}
+
+    while total > max_chars and any(costs.values()):
+        src, key = max(totals, key=totals.get)
+        cost = costs[(src, key)].pop()
+        sources[src][key].pop()
+        totals[(src, key)] -= cost
+        total -= cost
+
+    total = _estimate_tokens(s)
+    logger.info(f"Snapshot trimmed to ~{total} tokens (budget {max_tokens})")
     return s
 
 
-def _fallback_report(snapshot: dict, error: str) -> dict:
+def _rendered_chars(item: Any) -> int:
+    """Characters item adds to the rendered snapshot: indented at its list depth, plus its ",\n" separator."""
+    text = _dumps(item)
+    return len(text) + (text.count("\n") + 1) * _ITEM_INDENT + 2
+
+
+def _estimate_tokens(obj: Any) -> int:
+    """Cheap token estimate of the rendered JSON — roughly 4 characters per token."""
+    return max(1, len(_dumps(obj)) // _CHARS_PER_TOKEN)
+
+
+def _fallback_report(snapshot: dict, error: str, generated_at: str) -> dict:
     """Return a minimal report when the LLM call fails."""
     return {
         "overall_status": snapshot.get("overall_status", "error"),
@@ -163,6 +318,6 @@ def _fallback_report(snapshot: dict, error: str) -> dict:
             src: snapshot.get("sources", {}).get(src, {}).get("status", "unknown")
             for src in ["azure_ml", "azure_monitor", "jira", "shell"]
         },
-        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "generated_at": generated_at,
         "error": error,
     }
@@ -3,6 +3,8 @@ aggregator.py
 Runs all collectors in parallel, normalises the results into a single
 structured context object ready for the LLM agent.
 """
+import asyncio
+import atexit
 import logging
 import concurrent.futures
 from datetime import datetime, timezone
@@ -15,47 +17,39 @@ logger = logging.getLogger(__name__)
 # RAG status priority — higher index wins
 STATUS_RANK = {"healthy": 0, "warning": 1, "critical": 2, "error": 2}
 
+# Long-lived pool for the collectors without an async client, so worker
+# threads (and their SDK clients) survive across scheduled runs
+_EXEC = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="collector")
+atexit.register(_EXEC.shutdown, wait=False)
+
 
 def collect_all() -> dict[str, Any]:
+    """
+    Sync wrapper around collect_all_async() for callers without an event loop.
+    """
+    return asyncio.run(collect_all_async())
+
+
+async def collect_all_async() -> dict[str, Any]:
     """
     Run all collectors concurrently and return a unified platform snapshot.
     """
     logger.info("Starting parallel data collection from all sources...")
+    now_iso = datetime.now(timezone.utc).isoformat()
 
-    collectors = {
-        "azure_ml":      azure_ml.collect,
-        "azure_monitor": azure_monitor.collect,
-        "jira":          jira_collector.collect,
-        "shell":         shell_collector.collect,
-    }
-
-    results = {}
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-        futures = {executor.submit(fn): name for name, fn in collectors.items()}
-        for future in concurrent.futures.as_completed(futures):
-            name = futures[future]
-            try:
-                results[name] = future.result()
-                logger.info(f"✓ {name} collected — status: {results[name].get('status', 'unknown')}")
-            except Exception as e:
-                logger.error(f"✗ {name} collector raised exception: {e}")
-                results[name] = {
-                    "source": name,
-                    "status": "error",
-                    "error": str(e),
-                    "collected_at": datetime.now(timezone.utc).isoformat(),
-                }
+    results = await _collect_sources(now_iso)
 
     # ── Derive overall platform status ──────────────────────────
-    overall_status = "healthy"
-    for r in results.values():
-        s = r.get("status", "healthy")
-        if STATUS_RANK.get(s, 0) > STATUS_RANK.get(overall_status, 0):
-            overall_status = s
+    # max() keeps the first of equally ranked statuses (e.g. critical vs error)
+    overall_status = max(
+        (r.get("status", "healthy") for r in results.values()),
+        key=lambda s: STATUS_RANK.get(s, 0),
+        default="healthy",
+    )
 
     # ── Build unified snapshot ───────────────────────────────────
     snapshot = {
-        "collected_at": datetime.now(timezone.utc).isoformat(),
+        "collected_at": now_iso,
         "overall_status": overall_status,
         "sources": results,
         # Flattened key facts for quick LLM consumption
@@ -66,6 +60,37 @@ def collect_all() -> dict[str, Any]:
     return snapshot
 
 
+async def _collect_sources(now_iso: str) -> dict[str, dict]:
+    """
+    Await every collector on one event loop. Jira is natively async; the rest run
+    on the pool, where the Azure clients' cached credentials (and AAD tokens) persist
+    across runs — an aio client can't, as each asyncio.run() starts a new loop.
+    """
+    loop = asyncio.get_running_loop()
+    collectors = {
+        "azure_ml":      loop.run_in_executor(_EXEC, azure_ml.collect),
+        "azure_monitor": loop.run_in_executor(_EXEC, azure_monitor.collect),
+        "jira":          jira_collector.collect_async(),
+        "shell":         loop.run_in_executor(_EXEC, shell_collector.collect),
+    }
+    outcomes = await asyncio.gather(*collectors.values(), return_exceptions=True)
+
+    results = {}
+    for name, outcome in zip(collectors, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"✗ {name} collector raised exception: {outcome}")
+            results[name] = {
+                "source": name,
+                "status": "error",
+                "error": str(outcome),
+                "collected_at": now_iso,
+            }
+        else:
+            results[name] = outcome
+            logger.info(f"✓ {name} collected — status: {outcome.get('status', 'unknown')}")
+    return results
+
+
 def _extract_quick_facts(results: dict) -> dict:
     """Extract the most important numbers for the LLM prompt header."""
     facts = {}
@@ -2,19 +2,28 @@
 collectors/azure_ml.py
 Collects Azure ML job run statuses, failure details, and compute health.
 """
+from __future__ import annotations
+
+import functools
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Any
-
-from azure.ai.ml import MLClient
-from azure.identity import ClientSecretCredential
+from typing import TYPE_CHECKING, Any
 
 from config import settings
 
+# azure.ai.ml pulls in hundreds of modules — deferred to the first get_ml_client() call
+if TYPE_CHECKING:
+    from azure.ai.ml import MLClient
+
 logger = logging.getLogger(__name__)
 
 
+# Cached so the credential's AAD token cache and MLClient's ARM pipeline survive across runs
+@functools.lru_cache(maxsize=1)
 def get_ml_client() -> MLClient:
+    from azure.ai.ml import MLClient
+    from azure.identity import ClientSecretCredential
+
     credential = ClientSecretCredential(
         tenant_id=settings.azure_tenant_id,
         client_id=settings.azure_client_id,
@@ -38,40 +47,34 @@ def collect() -> dict[str, Any]:
         client = get_ml_client()
         cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.azure_ml_lookback_hours)
 
-        jobs = list(client.jobs.list())
-
         completed, failed, running, other = [], [], [], []
+        buckets = {
+            "Completed": completed,
+            "Failed":    failed,
+            "Running":   running,
+            "Starting":  running,
+            "Queued":    running,
+        }
 
-        for job in jobs:
-            # Filter to lookback window
-            created = getattr(job, "creation_context", None)
-            created_at = getattr(created, "created_at", None) if created else None
+        # jobs.list() pages lazily, newest first — stop at the first job outside the
+        # lookback window rather than paging through the workspace's whole history
+        for job in client.jobs.list():
+            created = job.creation_context
+            created_at = created.created_at if created else None
             if created_at and created_at < cutoff:
-                continue
+                break
 
-            status = getattr(job, "status", "Unknown")
-            entry = {
+            status = job.status or "Unknown"
+            bucket = buckets.get(status, other)
+            bucket.append({
                 "name": job.name,
-                "display_name": getattr(job, "display_name", job.name),
+                "display_name": job.display_name or job.name,
                 "status": status,
-                "type": getattr(job, "type", "Unknown"),
+                "type": job.type or "Unknown",
                 "created_at": str(created_at) if created_at else "Unknown",
-                "error": None,
-            }
-
-            if status == "Completed":
-                completed.append(entry)
-            elif status == "Failed":
-                # Try to pull error message
-                try:
-                    entry["error"] = getattr(job, "error", {})
-                except Exception:
-                    pass
-                failed.append(entry)
-            elif status in ("Running", "Starting", "Queued"):
-                running.append(entry)
-            else:
-                other.append(entry)
+                # Not every job type exposes an error — only failed jobs look for one
+                "error": getattr(job, "error", {}) if bucket is failed else None,
+            })
 
         # Compute cluster health
         compute_summary = []
@@ -98,7 +101,7 @@ def collect() -> dict[str, Any]:
             },
             "failed_jobs": failed,
             "running_jobs": running,
-            "completed_jobs": completed[:10],  # last 10 only to keep context lean
+            "completed_jobs": completed,
             "compute": compute_summary,
             "status": "healthy" if len(failed) == 0 else ("critical" if len(failed) > 3 else "warning"),
         }
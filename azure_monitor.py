@@ -2,20 +2,53 @@
 collectors/azure_monitor.py
 Pulls active alerts and key metrics from Azure Monitor / Log Analytics.
 """
+from __future__ import annotations
+
+import functools
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from azure.identity import ClientSecretCredential
-from azure.monitor.query import LogsQueryClient, MetricsQueryClient, LogsQueryStatus
 from azure.core.exceptions import HttpResponseError
 
 from config import settings
 
+# azure.identity / azure.monitor.query are slow to import — deferred to first use
+if TYPE_CHECKING:
+    from azure.monitor.query import LogsBatchQuery, LogsQueryClient
+
 logger = logging.getLogger(__name__)
 
+ALERTS_QUERY = """
+AlertsManagementResources
+| where type == 'microsoft.alertsmanagement/alerts'
+| where properties.essentials.startDateTime >= ago(24h)
+| project
+    alertName = properties.essentials.alertRule,
+    severity  = properties.essentials.severity,
+    state     = properties.essentials.alertState,
+    monitorCondition = properties.essentials.monitorCondition,
+    targetResource   = properties.essentials.targetResourceName,
+    firedAt   = properties.essentials.startDateTime
+| order by firedAt desc
+| limit 50
+"""
+
+RESOURCE_HEALTH_QUERY = """
+AzureActivity
+| where TimeGenerated >= ago(24h)
+| where Level in ("Critical", "Error", "Warning")
+| summarize EventCount=count() by ResourceGroup, ResourceId, OperationName, Level
+| order by EventCount desc
+| limit 20
+"""
+
 
+# Cached so the credential's AAD token cache survives across scheduled runs
+@functools.lru_cache(maxsize=1)
 def get_credentials():
+    from azure.identity import ClientSecretCredential
+
     return ClientSecretCredential(
         tenant_id=settings.azure_tenant_id,
         client_id=settings.azure_client_id,
@@ -23,6 +56,13 @@ def get_credentials():
     )
 
 
+@functools.lru_cache(maxsize=1)
+def get_logs_client() -> LogsQueryClient:
+    from azure.monitor.query import LogsQueryClient
+
+    return LogsQueryClient(get_credentials())
+
+
 def collect() -> dict[str, Any]:
     """
     Returns active alerts and platform metric anomalies
@@ -30,110 +70,98 @@ def collect() -> dict[str, Any]:
     """
     logger.info("Collecting Azure Monitor data...")
     try:
-        credential = get_credentials()
-        logs_client = LogsQueryClient(credential)
-
-        lookback = timedelta(hours=settings.azure_ml_lookback_hours)
-        end_time = datetime.now(timezone.utc)
-        start_time = end_time - lookback
-
-        alerts = _get_active_alerts(logs_client, start_time, end_time)
-        resource_health = _get_resource_health(logs_client, start_time, end_time)
-
-        critical = [a for a in alerts if a.get("severity") in ("Sev0", "Sev1", "Critical")]
-        warnings  = [a for a in alerts if a.get("severity") in ("Sev2", "Sev3", "Warning")]
-
-        status = "healthy"
-        if critical:
-            status = "critical"
-        elif warnings:
-            status = "warning"
-
-        result = {
-            "source": "azure_monitor",
-            "collected_at": end_time.isoformat(),
-            "lookback_hours": settings.azure_ml_lookback_hours,
-            "summary": {
-                "total_alerts": len(alerts),
-                "critical": len(critical),
-                "warnings": len(warnings),
-            },
-            "critical_alerts": critical,
-            "warning_alerts": warnings,
-            "resource_health": resource_health,
-            "status": status,
-        }
-
-        logger.info(f"Azure Monitor: {result['summary']}")
-        return result
+        logs_client = get_logs_client()
+
+        start_time, end_time = _time_window()
+
+        alerts, resource_health = _query_batch(logs_client, start_time, end_time)
+
+        return _build_result(alerts, resource_health, end_time)
 
     except Exception as e:
         logger.error(f"Azure Monitor collector failed: {e}")
-        return {
-            "source": "azure_monitor",
-            "status": "error",
-            "error": str(e),
-            "collected_at": datetime.now(timezone.utc).isoformat(),
-        }
-
-
-def _get_active_alerts(client: LogsQueryClient, start: datetime, end: datetime) -> list:
-    """Query Log Analytics for fired alerts."""
-    query = """
-    AlertsManagementResources
-    | where type == 'microsoft.alertsmanagement/alerts'
-    | where properties.essentials.startDateTime >= ago(24h)
-    | project
-        alertName = properties.essentials.alertRule,
-        severity  = properties.essentials.severity,
-        state     = properties.essentials.alertState,
-        monitorCondition = properties.essentials.monitorCondition,
-        targetResource   = properties.essentials.targetResourceName,
-        firedAt   = properties.essentials.startDateTime
-    | order by firedAt desc
-    | limit 50
-    """
-    try:
-        response = client.query_workspace(
-            workspace_id=settings.azure_monitor_workspace_id,
-            query=query,
-            timespan=(start, end),
-        )
-        if response.status == LogsQueryStatus.SUCCESS:
-            alerts = []
-            for row in response.tables[0].rows:
-                cols = response.tables[0].columns
-                alerts.append(dict(zip(cols, row)))
-            return alerts
-        return []
-    except HttpResponseError as e:
-        logger.warning(f"Alert query failed: {e}")
-        return []
-
-
-def _get_resource_health(client: LogsQueryClient, start: datetime, end: datetime) -> list:
-    """Query resource health events from the last window."""
-    query = """
-    AzureActivity
-    | where TimeGenerated >= ago(24h)
-    | where Level in ("Critical", "Error", "Warning")
-    | summarize EventCount=count() by ResourceGroup, ResourceId, OperationName, Level
-    | order by EventCount desc
-    | limit 20
-    """
+        return _error_result(e)
+
+
+def _time_window() -> tuple[datetime, datetime]:
+    lookback = timedelta(hours=settings.azure_ml_lookback_hours)
+    end_time = datetime.now(timezone.utc)
+    return end_time - lookback, end_time
+
+
+def _build_result(alerts: list, resource_health: list, end_time: datetime) -> dict[str, Any]:
+    """Classify alerts by severity and build the collector result."""
+    critical = [a for a in alerts if a.get("severity") in ("Sev0", "Sev1", "Critical")]
+    warnings  = [a for a in alerts if a.get("severity") in ("Sev2", "Sev3", "Warning")]
+
+    status = "healthy"
+    if critical:
+        status = "critical"
+    elif warnings:
+        status = "warning"
+
+    result = {
+        "source": "azure_monitor",
+        "collected_at": end_time.isoformat(),
+        "lookback_hours": settings.azure_ml_lookback_hours,
+        "summary": {
+            "total_alerts": len(alerts),
+            "critical": len(critical),
+            "warnings": len(warnings),
+        },
+        "critical_alerts": critical,
+        "warning_alerts": warnings,
+        "resource_health": resource_health,
+        "status": status,
+    }
+
+    logger.info(f"Azure Monitor: {result['summary']}")
+    return result
+
+
+def _error_result(error: Exception) -> dict[str, Any]:
+    return {
+        "source": "azure_monitor",
+        "status": "error",
+        "error": str(error),
+        "collected_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _batch(start: datetime, end: datetime) -> list[LogsBatchQuery]:
+    """Alert and resource health queries, sent together in one HTTP request."""
+    from azure.monitor.query import LogsBatchQuery
+
+    return [
+        LogsBatchQuery(workspace_id=settings.azure_monitor_workspace_id, query=query, timespan=(start, end))
+        for query in (ALERTS_QUERY, RESOURCE_HEALTH_QUERY)
+    ]
+
+
+def _query_batch(client: LogsQueryClient, start: datetime, end: datetime) -> tuple[list, list]:
+    """Query Log Analytics for fired alerts and resource health events."""
     try:
-        response = client.query_workspace(
-            workspace_id=settings.azure_monitor_workspace_id,
-            query=query,
-            timespan=(start, end),
-        )
-        if response.status == LogsQueryStatus.SUCCESS:
-            health = []
-            for row in response.tables[0].rows:
-                cols = response.tables[0].columns
-                health.append(dict(zip(cols, row)))
-            return health
-        return []
+        responses = client.query_batch(_batch(start, end))
     except HttpResponseError as e:
-        logger.warning(f"Resource health query failed: {e}")
-        return []
+        logger.warning(f"Alert / resource health batch query failed: {e}")
+        return [], []
+    return _split(responses)
+
+
+def _split(responses: list) -> tuple[list, list]:
+    """Split the batch responses (in request order) into alerts and resource health rows."""
+    alerts_response, health_response = responses
+    return _rows(alerts_response, "Alert"), _rows(health_response, "Resource health")
+
+
+def _rows(response, label: str) -> list:
+    """Convert the first result table of a successful query into dicts."""
+    from azure.monitor.query import LogsQueryStatus
+
+    if response.status == LogsQueryStatus.SUCCESS:
+        table = response.tables[0]
+        cols = table.columns
+        return [dict(zip(cols, row)) for row in table.rows]
+    if response.status == LogsQueryStatus.FAILURE:
+        logger.warning(f"{label} query failed: {response.message}")
+    return []
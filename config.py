@@ -2,9 +2,10 @@
 config.py — Centralised settings loaded from environment / .env file.
 All other modules import from here — no scattered os.getenv() calls.
 """
+from functools import cached_property
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import List
+from typing import Any, List
 from pathlib import Path
 
 
@@ -24,7 +25,7 @@ class Settings(BaseSettings):
     azure_monitor_workspace_id: str
     azure_monitor_resource_ids: str = ""
 
-    @property
+    @cached_property
     def monitor_resource_id_list(self) -> List[str]:
         return [r.strip() for r in self.azure_monitor_resource_ids.split(",") if r.strip()]
 
@@ -35,20 +36,24 @@ class Settings(BaseSettings):
     jira_project_key: str = "MLPLAT"
     jira_priority_filter: str = "P1,P2,High,Critical"
 
-    @property
+    @cached_property
     def jira_priorities(self) -> List[str]:
         return [p.strip() for p in self.jira_priority_filter.split(",")]
 
     # ── Shell Checks ────────────────────────────────────────────
     shell_check_scripts: str = ""
+    shell_min_interval: int = 0  # seconds; reuse the last results if checks ran more recently
 
-    @property
+    @cached_property
     def shell_scripts(self) -> List[str]:
         return [s.strip() for s in self.shell_check_scripts.split(",") if s.strip()]
 
     # ── Claude ──────────────────────────────────────────────────
     anthropic_api_key: str
     claude_model: str = "claude-sonnet-4-6"
+    claude_prompt_token_budget: int = 12000
+    enable_report_cache: bool = True
+    report_cache_ttl: int = 300  # seconds
 
     # ── Email ───────────────────────────────────────────────────
     smtp_host: str = "smtp.office365.com"
@@ -58,7 +63,7 @@ class Settings(BaseSettings):
     email_from: str
     email_to: str  # comma-separated
 
-    @property
+    @cached_property
     def email_recipients(self) -> List[str]:
         return [e.strip() for e in self.email_to.split(",") if e.strip()]
 
@@ -71,12 +76,16 @@ class Settings(BaseSettings):
 
     # ── Output ──────────────────────────────────────────────────
     report_output_dir: str = "./reports"
+    dedupe_notifications: bool = True  # skip email/Teams when a healthy report is unchanged
+    notification_dedupe_ttl: int = 604800  # seconds — re-send an unchanged report after a week; 0 = never
 
-    @property
+    @cached_property
     def report_dir(self) -> Path:
-        p = Path(self.report_output_dir)
-        p.mkdir(parents=True, exist_ok=True)
-        return p
+        return Path(self.report_output_dir)
+
+    def model_post_init(self, __context: Any) -> None:
+        # Create the output directory once at load time, not on every report_dir access
+        self.report_dir.mkdir(parents=True, exist_ok=True)
 
     class Config:
         env_file = ".env"
@@ -3,18 +3,48 @@ collectors/jira_collector.py
 Pulls open platform tickets from Jira — P1/P2/High priority issues,
 recent ticket velocity, and SLA breaches.
 """
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
 import logging
+from collections import Counter
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from jira import JIRA, JIRAError
+import aiohttp
 
 from config import settings
 
+if TYPE_CHECKING:
+    from jira import JIRA
+
 logger = logging.getLogger(__name__)
 
+_JIRA_URL = settings.jira_url
+
+
+class _JiraNotImported(Exception):
+    """Placeholder until the jira package is imported — nothing raises it."""
+
+
+# Bound to jira.JIRAError by get_jira_client(); the jira package is only imported on first use
+_JIRAError: type[Exception] = _JiraNotImported
+
+# Only the fields _format_issue / _format_resolved render — "comment" in particular pulls every comment per ticket
+SEARCH_FIELDS = ["summary", "status", "priority", "assignee", "created", "updated", "resolutiondate"]
+
+MAX_OPEN = 50
+MAX_RESOLVED = 20
+SEARCH_PAGE_SIZE = 100
+SEARCH_MAX = 200  # combined search stops here — at most 2 pages per run
+
 
 def get_jira_client() -> JIRA:
+    global _JIRAError
+    from jira import JIRA, JIRAError
+
+    _JIRAError = JIRAError
     return JIRA(
         server=settings.jira_url,
         basic_auth=(settings.jira_email, settings.jira_api_token),
@@ -29,104 +59,205 @@ def collect() -> dict[str, Any]:
     logger.info("Collecting Jira ticket data...")
     try:
         client = get_jira_client()
-        project = settings.jira_project_key
-        priorities = '", "'.join(settings.jira_priorities)
-
-        # ── Open high priority tickets ──────────────────────────
-        open_jql = (
-            f'project = "{project}" '
-            f'AND status != Done '
-            f'AND priority in ("{priorities}") '
-            f'ORDER BY priority ASC, created DESC'
-        )
-        open_issues = client.search_issues(open_jql, maxResults=50, fields=[
-            "summary", "status", "priority", "assignee",
-            "created", "updated", "description", "comment"
-        ])
-
-        # ── Tickets resolved in last 24h ────────────────────────
-        resolved_jql = (
-            f'project = "{project}" '
-            f'AND status = Done '
-            f'AND resolved >= -24h '
-            f'ORDER BY resolved DESC'
-        )
-        resolved_issues = client.search_issues(resolved_jql, maxResults=20, fields=[
-            "summary", "priority", "resolutiondate"
-        ])
-
-        # ── All tickets created in last 7 days (velocity) ───────
-        velocity_jql = (
-            f'project = "{project}" '
-            f'AND created >= -7d '
-            f'ORDER BY created DESC'
+        search_jql, velocity_jql = _build_jql()
+
+        # Independent REST calls — the jira client's requests session releases the GIL on I/O.
+        # json_result=True returns the raw REST payload, skipping per-issue Resource objects.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            f_search = executor.submit(_search, client, search_jql)
+            f_velocity = executor.submit(_count, client, velocity_jql)
+            issues, created_count = f_search.result(), f_velocity.result()
+
+        return _build_result(*_partition(issues), created_count)
+
+    except _JIRAError as e:
+        logger.error(f"Jira collector failed: {e}")
+        return _error_result(e)
+
+
+async def collect_async() -> dict[str, Any]:
+    """
+    Async variant of collect() — fires the ticket search and the velocity count
+    concurrently against the Jira REST API instead of one after another.
+    """
+    logger.info("Collecting Jira ticket data...")
+    try:
+        search_jql, velocity_jql = _build_jql()
+        auth = aiohttp.BasicAuth(settings.jira_email, settings.jira_api_token)
+        async with aiohttp.ClientSession(auth=auth, timeout=aiohttp.ClientTimeout(total=60)) as session:
+            issues, created_count = await asyncio.gather(
+                _search_async(session, search_jql),
+                _count_async(session, velocity_jql),
+            )
+
+        return _build_result(*_partition(issues), created_count)
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Jira collector failed: {e}")
+        return _error_result(e)
+
+
+def _count(client: JIRA, jql: str) -> int:
+    """
+    Return the number of issues matching jql without fetching them.
+    Goes to REST directly — search_issues treats maxResults=0 as "fetch everything".
+    """
+    response = client._session.get(
+        f"{_JIRA_URL}/rest/api/2/search",
+        params={"jql": jql, "maxResults": 0},
+    )
+    return response.json()["total"]
+
+
+def _search(client: JIRA, jql: str) -> list[dict]:
+    """
+    Return up to SEARCH_MAX issues matching jql as raw dicts, a page at a time.
+    The combined search interleaves open and resolved tickets by priority, so a
+    MAX_OPEN + MAX_RESOLVED page could cut either list short — usually one page holds it all.
+    """
+    issues: list[dict] = []
+    while True:
+        page = client.search_issues(
+            jql, startAt=len(issues), maxResults=SEARCH_PAGE_SIZE, fields=SEARCH_FIELDS, json_result=True
         )
-        velocity_issues = client.search_issues(velocity_jql, maxResults=200, fields=["created", "status"])
-
-        open_formatted = [_format_issue(i) for i in open_issues]
-        resolved_formatted = [_format_resolved(i) for i in resolved_issues]
-
-        # Count by priority
-        priority_counts: dict[str, int] = {}
-        for issue in open_formatted:
-            p = issue["priority"]
-            priority_counts[p] = priority_counts.get(p, 0) + 1
-
-        status = "healthy"
-        p1_count = priority_counts.get("P1", 0) + priority_counts.get("Critical", 0)
-        p2_count = priority_counts.get("P2", 0) + priority_counts.get("High", 0)
-        if p1_count > 0:
-            status = "critical"
-        elif p2_count > 2:
-            status = "warning"
-
-        result = {
-            "source": "jira",
-            "collected_at": datetime.now(timezone.utc).isoformat(),
-            "summary": {
-                "open_high_priority": len(open_formatted),
-                "resolved_last_24h": len(resolved_formatted),
-                "created_last_7d": len(velocity_issues),
-                "by_priority": priority_counts,
+        issues.extend(page["issues"])
+        if not page["issues"] or len(issues) >= min(page["total"], SEARCH_MAX):
+            return issues
+
+
+async def _search_async(session: aiohttp.ClientSession, jql: str) -> list[dict]:
+    """Async variant of _search() over the Jira REST API."""
+    issues: list[dict] = []
+    while True:
+        async with session.get(
+            f"{_JIRA_URL}/rest/api/2/search",
+            params={
+                "jql": jql,
+                "startAt": len(issues),
+                "maxResults": SEARCH_PAGE_SIZE,
+                "fields": ",".join(SEARCH_FIELDS),
             },
-            "open_tickets": open_formatted,
-            "resolved_last_24h": resolved_formatted,
-            "status": status,
-        }
+        ) as response:
+            response.raise_for_status()
+            page = await response.json()
+        issues.extend(page.get("issues", []))
+        if not page.get("issues") or len(issues) >= min(page["total"], SEARCH_MAX):
+            return issues
 
-        logger.info(f"Jira: {result['summary']}")
-        return result
 
-    except JIRAError as e:
-        logger.error(f"Jira collector failed: {e}")
-        return {
-            "source": "jira",
-            "status": "error",
-            "error": str(e),
-            "collected_at": datetime.now(timezone.utc).isoformat(),
-        }
+async def _count_async(session: aiohttp.ClientSession, jql: str) -> int:
+    """Return the number of issues matching jql without fetching them."""
+    async with session.get(
+        f"{_JIRA_URL}/rest/api/2/search",
+        params={"jql": jql, "maxResults": 0},
+    ) as response:
+        response.raise_for_status()
+        data = await response.json()
+    return data["total"]
+
+
+def _build_jql() -> tuple[str, str]:
+    """Return the ticket search and velocity JQL queries for the project."""
+    project = settings.jira_project_key
+    priorities = '", "'.join(settings.jira_priorities)
+
+    # ── Open high priority OR resolved in last 24h ──────────────
+    # One search for both lists — _partition splits them apart again
+    search_jql = (
+        f'project = "{project}" '
+        f'AND ((status != Done AND priority in ("{priorities}")) '
+        f'OR (status = Done AND resolved >= -24h)) '
+        f'ORDER BY priority ASC, created DESC'
+    )
+
+    # ── All tickets created in last 7 days (velocity) ───────────
+    velocity_jql = (
+        f'project = "{project}" '
+        f'AND created >= -7d '
+        f'ORDER BY created DESC'
+    )
+
+    return search_jql, velocity_jql
+
+
+def _partition(issues: list[dict]) -> tuple[list[dict], list[dict]]:
+    """Split the combined search into formatted open and recently resolved tickets."""
+    open_issues, resolved_issues = [], []
+    for issue in issues:
+        status = (issue["fields"].get("status") or {}).get("name")
+        (resolved_issues if status == "Done" else open_issues).append(issue)
+
+    # The search is ordered for the open list — resolved tickets go newest first.
+    # Best effort past SEARCH_MAX: a larger backlog can push recent resolutions out of the fetched pages.
+    resolved_issues.sort(key=lambda i: i["fields"].get("resolutiondate") or "", reverse=True)
+    return (
+        [_format_issue(i) for i in open_issues[:MAX_OPEN]],
+        [_format_resolved(i) for i in resolved_issues[:MAX_RESOLVED]],
+    )
+
+
+def _build_result(open_formatted: list[dict], resolved_formatted: list[dict], created_count: int) -> dict[str, Any]:
+    """Summarise formatted tickets into the collector result."""
+    # Count by priority
+    priority_counts = dict(Counter(i["priority"] for i in open_formatted))
+
+    status = "healthy"
+    p1_count = priority_counts.get("P1", 0) + priority_counts.get("Critical", 0)
+    p2_count = priority_counts.get("P2", 0) + priority_counts.get("High", 0)
+    if p1_count > 0:
+        status = "critical"
+    elif p2_count > 2:
+        status = "warning"
+
+    result = {
+        "source": "jira",
+        "collected_at": datetime.now(timezone.utc).isoformat(),
+        "summary": {
+            "open_high_priority": len(open_formatted),
+            "resolved_last_24h": len(resolved_formatted),
+            "created_last_7d": created_count,
+            "by_priority": priority_counts,
+        },
+        "open_tickets": open_formatted,
+        "resolved_last_24h": resolved_formatted,
+        "status": status,
+    }
+
+    logger.info(f"Jira: {result['summary']}")
+    return result
+
+
+def _error_result(error: Exception) -> dict[str, Any]:
+    return {
+        "source": "jira",
+        "status": "error",
+        "error": str(error),
+        "collected_at": datetime.now(timezone.utc).isoformat(),
+    }
 
 
-def _format_issue(issue) -> dict:
-    fields = issue.fields
+def _format_issue(issue: dict) -> dict:
+    fields = issue["fields"]
+    key = issue["key"]
     return {
-        "key": issue.key,
-        "summary": fields.summary,
-        "priority": fields.priority.name if fields.priority else "Unknown",
-        "status": fields.status.name if fields.status else "Unknown",
-        "assignee": fields.assignee.displayName if fields.assignee else "Unassigned",
-        "created": str(fields.created),
-        "updated": str(fields.updated),
-        "url": f"{settings.jira_url}/browse/{issue.key}",
+        "key": key,
+        "summary": fields["summary"],
+        "priority": (fields.get("priority") or {}).get("name", "Unknown"),
+        "status": (fields.get("status") or {}).get("name", "Unknown"),
+        "assignee": (fields.get("assignee") or {}).get("displayName", "Unassigned"),
+        "created": fields["created"],
+        "updated": fields["updated"],
+        "url": f"{_JIRA_URL}/browse/{key}",
     }
 
 
-def _format_resolved(issue) -> dict:
-    fields = issue.fields
+def _format_resolved(issue: dict) -> dict:
+    fields = issue["fields"]
+    key = issue["key"]
     return {
-        "key": issue.key,
-        "summary": fields.summary,
-        "priority": fields.priority.name if fields.priority else "Unknown",
-        "resolved_at": str(fields.resolutiondate),
-        "url": f"{settings.jira_url}/browse/{issue.key}",
+        "key": key,
+        "summary": fields["summary"],
+        "priority": (fields.get("priority") or {}).get("name", "Unknown"),
+        "resolved_at": str(fields.get("resolutiondate")),
+        "url": f"{_JIRA_URL}/browse/{key}",
     }
@@ -8,18 +8,16 @@ Usage:
   python main.py --dry-run    # run with mock data (no real Azure/Jira needed)
 """
 import argparse
+import asyncio
+import copy
 import json
 import logging
 import sys
-import time
 from datetime import datetime, timezone
 from pathlib import Path
 
-import schedule
-
-from aggregator import collect_all
-from agent import analyse
-from reporter import render_and_deliver
+# Pipeline modules (and APScheduler) are imported where they are used — they pull in
+# the Anthropic, Azure and Jinja2 stacks, which `--help` and dry runs don't all need
 
 # ── Logging setup ────────────────────────────────────────────────
 logging.basicConfig(
@@ -45,17 +43,20 @@ def run_health_check(dry_run: bool = False) -> None:
     logger.info("=" * 60)
 
     try:
-        # 1. Collect from all sources
+        # 1. Collect from all sources concurrently
         if dry_run:
             logger.info("DRY RUN: Loading mock data...")
             snapshot = _load_mock_data()
         else:
-            snapshot = collect_all()
+            from aggregator import collect_all_async
+            snapshot = asyncio.run(collect_all_async())
 
         # 2. Analyse with Claude
+        from agent import analyse
         report = analyse(snapshot)
 
         # 3. Render + deliver (email + Teams + save HTML)
+        from reporter import render_and_deliver
         report_path = render_and_deliver(report, snapshot)
 
         logger.info("=" * 60)
@@ -67,100 +68,107 @@ def run_health_check(dry_run: bool = False) -> None:
         logger.critical(f"Health agent run failed catastrophically: {e}", exc_info=True)
 
 
-def _load_mock_data() -> dict:
-    """
-    Load mock platform data for dry-run / portfolio demo mode.
-    Simulates a platform with some warnings to make the report interesting.
-    """
-    return {
-        "collected_at": datetime.now(timezone.utc).isoformat(),
-        "overall_status": "warning",
-        "quick_facts": {
-            "ml_jobs_failed": 2,
-            "ml_jobs_running": 5,
-            "ml_jobs_completed": 18,
-            "monitor_critical_alerts": 0,
-            "monitor_warnings": 3,
-            "jira_open_high_priority": 4,
-            "jira_resolved_24h": 2,
-            "jira_created_7d": 11,
-            "shell_checks_critical": 0,
-            "shell_checks_warnings": 1,
+# Mock platform data for dry-run / portfolio demo mode — built once, timestamps filled per run.
+# Simulates a platform with some warnings to make the report interesting.
+_MOCK_TEMPLATE: dict = {
+    "collected_at": "",
+    "overall_status": "warning",
+    "quick_facts": {
+        "ml_jobs_failed": 2,
+        "ml_jobs_running": 5,
+        "ml_jobs_completed": 18,
+        "monitor_critical_alerts": 0,
+        "monitor_warnings": 3,
+        "jira_open_high_priority": 4,
+        "jira_resolved_24h": 2,
+        "jira_created_7d": 11,
+        "shell_checks_critical": 0,
+        "shell_checks_warnings": 1,
+    },
+    "sources": {
+        "azure_ml": {
+            "source": "azure_ml",
+            "status": "warning",
+            "lookback_hours": 24,
+            "collected_at": "",
+            "summary": {"total": 25, "completed": 18, "failed": 2, "running": 5, "other": 0},
+            "failed_jobs": [
+                {"name": "demand-forecast-prod-run-20241201", "display_name": "Demand Forecast Prod",
+                 "status": "Failed", "type": "pipeline", "error": {"message": "OOMKilled on compute cluster"}},
+                {"name": "churn-model-retrain-weekly", "display_name": "Churn Model Weekly Retrain",
+                 "status": "Failed", "type": "command", "error": {"message": "Data drift detected — input schema mismatch"}},
+            ],
+            "running_jobs": [
+                {"name": "pricing-model-inference-batch", "display_name": "Pricing Inference Batch", "status": "Running"},
+                {"name": "inventory-forecast-daily",     "display_name": "Inventory Forecast Daily", "status": "Running"},
+            ],
+            "compute": [
+                {"name": "cpu-cluster-prod",  "type": "AmlCompute", "state": "Succeeded"},
+                {"name": "gpu-cluster-train", "type": "AmlCompute", "state": "Succeeded"},
+            ],
         },
-        "sources": {
-            "azure_ml": {
-                "source": "azure_ml",
-                "status": "warning",
-                "lookback_hours": 24,
-                "collected_at": datetime.now(timezone.utc).isoformat(),
-                "summary": {"total": 25, "completed": 18, "failed": 2, "running": 5, "other": 0},
-                "failed_jobs": [
-                    {"name": "demand-forecast-prod-run-20241201", "display_name": "Demand Forecast Prod",
-                     "status": "Failed", "type": "pipeline", "error": {"message": "OOMKilled on compute cluster"}},
-                    {"name": "churn-model-retrain-weekly", "display_name": "Churn Model Weekly Retrain",
-                     "status": "Failed", "type": "command", "error": {"message": "Data drift detected — input schema mismatch"}},
-                ],
-                "running_jobs": [
-                    {"name": "pricing-model-inference-batch", "display_name": "Pricing Inference Batch", "status": "Running"},
-                    {"name": "inventory-forecast-daily",     "display_name": "Inventory Forecast Daily", "status": "Running"},
-                ],
-                "compute": [
-                    {"name": "cpu-cluster-prod",  "type": "AmlCompute", "state": "Succeeded"},
-                    {"name": "gpu-cluster-train", "type": "AmlCompute", "state": "Succeeded"},
-                ],
-            },
-            "azure_monitor": {
-                "source": "azure_monitor",
-                "status": "warning",
-                "collected_at": datetime.now(timezone.utc).isoformat(),
-                "summary": {"total_alerts": 3, "critical": 0, "warnings": 3},
-                "critical_alerts": [],
-                "warning_alerts": [
-                    {"alertName": "High CPU on cpu-cluster-prod",   "severity": "Sev2", "targetResource": "cpu-cluster-prod"},
-                    {"alertName": "Storage account latency elevated", "severity": "Sev3", "targetResource": "mlstorageprod"},
-                    {"alertName": "Endpoint response time > 2s",     "severity": "Sev3", "targetResource": "pricing-endpoint"},
-                ],
-                "resource_health": [],
-            },
-            "jira": {
-                "source": "jira",
-                "status": "warning",
-                "collected_at": datetime.now(timezone.utc).isoformat(),
-                "summary": {
-                    "open_high_priority": 4,
-                    "resolved_last_24h": 2,
-                    "created_last_7d": 11,
-                    "by_priority": {"P1": 0, "P2": 2, "High": 2},
-                },
-                "open_tickets": [
-                    {"key": "MLPLAT-412", "summary": "Demand forecast pipeline OOM failure in prod",
-                     "priority": "P2", "status": "In Progress", "assignee": "Raja Himakar"},
-                    {"key": "MLPLAT-408", "summary": "Churn model retrain failing due to schema drift",
-                     "priority": "P2", "status": "Open", "assignee": "Unassigned"},
-                    {"key": "MLPLAT-401", "summary": "Pricing endpoint p99 latency exceeding SLA",
-                     "priority": "High", "status": "In Progress", "assignee": "Raja Himakar"},
-                    {"key": "MLPLAT-399", "summary": "R Shiny dashboard not loading for AU-East users",
-                     "priority": "High", "status": "Open", "assignee": "Unassigned"},
-                ],
-                "resolved_last_24h": [
-                    {"key": "MLPLAT-405", "summary": "Compute quota increase approved and applied", "priority": "P2"},
-                    {"key": "MLPLAT-397", "summary": "Azure ML SDK version pinned across all pipelines", "priority": "High"},
-                ],
-            },
-            "shell": {
-                "source": "shell_checks",
-                "status": "warning",
-                "collected_at": datetime.now(timezone.utc).isoformat(),
-                "summary": {"total_checks": 2, "healthy": 1, "warnings": 1, "critical": 0, "errors": 0},
-                "checks": [
-                    {"name": "disk_usage_check",    "status": "warning",
-                     "output": "High disk usage detected: /mnt/mldata: 87%"},
-                    {"name": "python_process_check", "status": "healthy",
-                     "output": "12 Python process(es) running"},
-                ],
+        "azure_monitor": {
+            "source": "azure_monitor",
+            "status": "warning",
+            "collected_at": "",
+            "summary": {"total_alerts": 3, "critical": 0, "warnings": 3},
+            "critical_alerts": [],
+            "warning_alerts": [
+                {"alertName": "High CPU on cpu-cluster-prod",   "severity": "Sev2", "targetResource": "cpu-cluster-prod"},
+                {"alertName": "Storage account latency elevated", "severity": "Sev3", "targetResource": "mlstorageprod"},
+                {"alertName": "Endpoint response time > 2s",     "severity": "Sev3", "targetResource": "pricing-endpoint"},
+            ],
+            "resource_health": [],
+        },
+        "jira": {
+            "source": "jira",
+            "status": "warning",
+            "collected_at": "",
+            "summary": {
+                "open_high_priority": 4,
+                "resolved_last_24h": 2,
+                "created_last_7d": 11,
+                "by_priority": {"P1": 0, "P2": 2, "High": 2},
             },
+            "open_tickets": [
+                {"key": "MLPLAT-412", "summary": "Demand forecast pipeline OOM failure in prod",
+                 "priority": "P2", "status": "In Progress", "assignee": "Raja Himakar"},
+                {"key": "MLPLAT-408", "summary": "Churn model retrain failing due to schema drift",
+                 "priority": "P2", "status": "Open", "assignee": "Unassigned"},
+                {"key": "MLPLAT-401", "summary": "Pricing endpoint p99 latency exceeding SLA",
+                 "priority": "High", "status": "In Progress", "assignee": "Raja Himakar"},
+                {"key": "MLPLAT-399", "summary": "R Shiny dashboard not loading for AU-East users",
+                 "priority": "High", "status": "Open", "assignee": "Unassigned"},
+            ],
+            "resolved_last_24h": [
+                {"key": "MLPLAT-405", "summary": "Compute quota increase approved and applied", "priority": "P2"},
+                {"key": "MLPLAT-397", "summary": "Azure ML SDK version pinned across all pipelines", "priority": "High"},
+            ],
+        },
+        "shell": {
+            "source": "shell_checks",
+            "status": "warning",
+            "collected_at": "",
+            "summary": {"total_checks": 2, "healthy": 1, "warnings": 1, "critical": 0, "errors": 0},
+            "checks": [
+                {"name": "disk_usage_check",    "status": "warning",
+                 "output": "High disk usage detected: /mnt/mldata: 87%"},
+                {"name": "python_process_check", "status": "healthy",
+                 "output": "12 Python process(es) running"},
+            ],
         },
-    }
+    },
+}
+
+
+def _load_mock_data() -> dict:
+    """Return a fresh copy of the mock snapshot stamped with the current time."""
+    data = copy.deepcopy(_MOCK_TEMPLATE)
+    now = datetime.now(timezone.utc).isoformat()
+    data["collected_at"] = now
+    for src in data["sources"].values():
+        src["collected_at"] = now
+    return data
 
 
 def main():
@@ -170,16 +178,28 @@ def main():
     args = parser.parse_args()
 
     if args.schedule:
+        from apscheduler.schedulers.blocking import BlockingScheduler
         from config import settings
         logger.info(f"Scheduled mode: running daily at {settings.schedule_time} ({settings.schedule_timezone})")
-        schedule.every().day.at(settings.schedule_time).do(run_health_check, dry_run=args.dry_run)
+
+        # Sleeps until the next fire time rather than polling; a run that overruns
+        # into the next slot is skipped instead of stacking up behind it
+        scheduler = BlockingScheduler(
+            timezone=settings.schedule_timezone,
+            job_defaults={"coalesce": True, "max_instances": 1},
+        )
+        hour, minute = settings.schedule_time.split(":")
+        scheduler.add_job(
+            run_health_check, "cron", hour=int(hour), minute=int(minute), kwargs={"dry_run": args.dry_run}
+        )
 
         # Run immediately on start too
         run_health_check(dry_run=args.dry_run)
 
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+        try:
+            scheduler.start()
+        except (KeyboardInterrupt, SystemExit):
+            logger.info("Scheduler stopped.")
     else:
         run_health_check(dry_run=args.dry_run)
 
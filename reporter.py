@@ -2,63 +2,136 @@
 reporter.py
 Renders the HTML report and delivers it via Email and Microsoft Teams.
 """
+from __future__ import annotations
+
+import atexit
+import concurrent.futures
+import gzip
+import hashlib
 import json
 import logging
 import smtplib
 import ssl
+import threading
+import time
 from datetime import datetime, timezone
+from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from enum import IntEnum
 from pathlib import Path
 from typing import Any
 
 import requests
-from jinja2 import Environment, FileSystemLoader
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from jinja2 import Environment, FileSystemLoader, TemplateStream
 
 from config import settings
 
+try:
+    import orjson
+except ImportError:  # orjson is optional — fall back to the stdlib encoder
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
-STATUS_COLOR = {
-    "healthy":  "#1a7a3a",
-    "warning":  "#b45309",
-    "critical": "#991b1b",
-    "error":    "#6b21a8",
-}
 
-STATUS_EMOJI = {
-    "healthy":  "✅",
-    "warning":  "⚠️",
-    "critical": "🔴",
-    "error":    "❌",
+class Status(IntEnum):
+    """Report status as an index into STATUS_COLORS / STATUS_EMOJIS — not a severity ranking (see aggregator.STATUS_RANK)."""
+    HEALTHY  = 0
+    WARNING  = 1
+    CRITICAL = 2
+    ERROR    = 3
+    UNKNOWN  = 4
+
+
+# Indexed by Status
+STATUS_COLORS = ("#1a7a3a", "#b45309", "#991b1b", "#6b21a8", "#6b7280")
+STATUS_EMOJIS = ("✅", "⚠️", "🔴", "❌", "❓")
+
+_STATUS_INDEX = {
+    "healthy":  Status.HEALTHY,
+    "warning":  Status.WARNING,
+    "critical": Status.CRITICAL,
+    "error":    Status.ERROR,
 }
 
+SMTP_TIMEOUT = 10  # seconds
+
+# Reports larger than this are sent as a gzipped attachment instead of an inline HTML body
+EMAIL_INLINE_MAX_BYTES = 256_000
+
+# Hash of the last delivered report, kept in the report directory between runs
+NOTIFICATION_HASH_FILE = ".last_notification_hash"
+
+# One SMTP connection kept open between runs — saves the STARTTLS + LOGIN handshake
+# when runs are close enough together that the server hasn't dropped it
+_smtp: smtplib.SMTP | None = None
+_smtp_lock = threading.Lock()
+
+# Reused across runs so scheduled posts skip DNS + TLS setup; retries transient webhook failures.
+# POST has to be allowed explicitly — urllib3 only retries idempotent methods by default.
+_TEAMS_SESSION = requests.Session()
+_TEAMS_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=2,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    ),
+))
+
+# Shared across runs; auto_reload=False skips the template mtime check on every render
+_ENV = Environment(
+    loader=FileSystemLoader(str(Path(__file__).parent / "templates")),
+    autoescape=True,
+    auto_reload=False,
+)
+
+
+def _status(value: str) -> Status:
+    """Map a status string to its Status — UNKNOWN for anything unrecognised."""
+    return _STATUS_INDEX.get(value, Status.UNKNOWN)
+
 
 def render_and_deliver(report: dict[str, Any], snapshot: dict[str, Any]) -> Path:
     """
     Main entry point:
-    1. Render HTML report
-    2. Save to disk
-    3. Send email
-    4. Post Teams card
+    1. Render HTML report to disk
+    2. Save JSON, send email and post Teams card in parallel
     Returns the path to the saved HTML report.
     """
-    html = _render_html(report)
-    report_path = _save_report(html, report)
-
-    _send_email(html, report)
-    _send_teams(report, snapshot, report_path)
+    report_path = _save_report(report)
+    digest = _report_digest(report)
+    notify = not (settings.dedupe_notifications and _recently_notified(report, digest))
+    if not notify:
+        logger.info("No material change since the last healthy report — skipping notifications.")
+
+    # Independent I/O — the email only needs the HTML, which is already on disk
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3, thread_name_prefix="deliver") as executor:
+        f_json = executor.submit(_save_json, report_path.with_suffix(".json"), report)
+        sends = [
+            executor.submit(_send_email, report_path, report),
+            executor.submit(_send_teams, report, snapshot, report_path),
+        ] if notify else []
+        f_json.result()
+        delivered = [f.result() for f in sends]
+
+    # Only remembered once delivered — a failed send is retried by the next identical run
+    if notify and all(delivered):
+        _record_notification(digest)
 
     return report_path
 
 
-def _render_html(report: dict) -> str:
-    """Render the Jinja2 HTML template with report data."""
-    env = Environment(
-        loader=FileSystemLoader(str(Path(__file__).parent / "templates")),
-        autoescape=True,
-    )
-    template = env.get_template("report.html")
+def _render_stream(report: dict) -> TemplateStream:
+    """Render the Jinja2 HTML template with report data, chunk by chunk."""
+    # Parsed on the first render, then served from the environment's cache
+    template = _ENV.get_template("report.html")
 
     overall = report.get("overall_status", "error")
     narrative = report.get("narrative", "")
@@ -69,9 +142,9 @@ def _render_html(report: dict) -> str:
 
     now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
 
-    return template.render(
+    return template.stream(
         overall_status=overall.upper(),
-        status_color=STATUS_COLOR.get(overall, "#6b7280"),
+        status_color=STATUS_COLORS[_status(overall)],
         headline=report.get("headline", ""),
         narrative_paragraphs=narrative_paragraphs,
         anomalies=report.get("anomalies", []),
@@ -83,75 +156,177 @@ def _render_html(report: dict) -> str:
     )
 
 
-def _save_report(html: str, report: dict) -> Path:
-    """Save HTML report to disk with timestamp filename."""
+def _save_report(report: dict) -> Path:
+    """Render the HTML report straight to disk with timestamp filename."""
     ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
     filename = f"platform_health_{ts}.html"
     path = settings.report_dir / filename
 
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
-
-    # Also save raw JSON for audit trail
-    json_path = settings.report_dir / f"platform_health_{ts}.json"
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(report, f, indent=2, default=str)
+    # Streamed to the file, so the full HTML is never held in memory here
+    _render_stream(report).dump(str(path), encoding="utf-8")
 
     logger.info(f"Report saved: {path}")
     return path
 
 
-def _send_email(html: str, report: dict) -> None:
-    """Send the HTML report as an email."""
+def _save_json(json_path: Path, report: dict) -> None:
+    """Save the raw report JSON alongside the HTML for audit trail."""
+    if orjson is not None:
+        with open(json_path, "wb") as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NAIVE_UTC, default=str))
+    else:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+def _report_digest(report: dict) -> str:
+    """
+    Hash the material parts of the report — statuses and which anomalies were raised.
+    Claude's headline, narrative and actions are reworded on every call, so they're left out.
+    """
+    content = {
+        "overall_status": report.get("overall_status"),
+        "source_statuses": report.get("source_statuses", {}),
+        "anomalies": sorted(
+            (a.get("source", ""), a.get("severity", ""), a.get("title", ""))
+            for a in report.get("anomalies", [])
+        ),
+    }
+    if orjson is not None:
+        encoded = orjson.dumps(content, option=orjson.OPT_SORT_KEYS | orjson.OPT_NAIVE_UTC, default=str)
+    else:
+        encoded = json.dumps(content, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def _recently_notified(report: dict, digest: str) -> bool:
+    """
+    True when a healthy report matches the last one delivered within
+    settings.notification_dedupe_ttl seconds (0 means it never expires).
+    """
+    if report.get("overall_status") != "healthy":
+        return False
+    ttl = settings.notification_dedupe_ttl
+    try:
+        last = json.loads((settings.report_dir / NOTIFICATION_HASH_FILE).read_text(encoding="utf-8"))
+        return last["hash"] == digest and (not ttl or time.time() - last["sent_at"] < ttl)
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+
+def _record_notification(digest: str) -> None:
+    """Remember the delivered report's hash and when it was sent."""
+    (settings.report_dir / NOTIFICATION_HASH_FILE).write_text(
+        json.dumps({"hash": digest, "sent_at": time.time()}), encoding="utf-8"
+    )
+
+
+def _send_email(report_path: Path, report: dict) -> bool:
+    """Send the saved HTML report as an email. Returns False if delivery failed."""
     if not settings.email_recipients:
         logger.warning("No email recipients configured — skipping email.")
-        return
+        return True
 
-    overall = report.get("overall_status", "error").upper()
-    emoji = STATUS_EMOJI.get(report.get("overall_status", "error"), "📋")
+    status = report.get("overall_status", "error")
+    overall = status.upper()
+    emoji = STATUS_EMOJIS[_status(status)]
     subject = f"{emoji} ML Platform Health — {overall} — {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}"
 
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = subject
-    msg["From"]    = settings.email_from
-    msg["To"]      = ", ".join(settings.email_recipients)
-
     # Plain text fallback
     plain = (
         f"ML Platform Health Report\n"
         f"Status: {overall}\n"
         f"{report.get('headline', '')}\n\n"
         f"{report.get('narrative', '')}\n\n"
-        f"View full report in the HTML attachment."
     )
-    msg.attach(MIMEText(plain, "plain"))
-    msg.attach(MIMEText(html, "html"))
+
+    if report_path.stat().st_size > EMAIL_INLINE_MAX_BYTES:
+        # Too big to inline — gzip it (HTML compresses ~5-10x) and attach
+        msg = MIMEMultipart("mixed")
+        msg.attach(MIMEText(
+            plain + f"Full report attached (gzipped). Local path: {report_path}", "plain"
+        ))
+        part = MIMEApplication(gzip.compress(report_path.read_bytes()), _subtype="gzip")
+        part.add_header("Content-Disposition", "attachment", filename=f"{report_path.name}.gz")
+        msg.attach(part)
+    else:
+        msg = MIMEMultipart("alternative")
+        msg.attach(MIMEText(plain + "View full report in the HTML attachment.", "plain"))
+        msg.attach(MIMEText(report_path.read_text(encoding="utf-8"), "html"))
+
+    msg["Subject"] = subject
+    msg["From"]    = settings.email_from
+    msg["To"]      = ", ".join(settings.email_recipients)
 
     try:
-        context = ssl.create_default_context()
-        with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
-            server.ehlo()
-            server.starttls(context=context)
-            server.login(settings.smtp_user, settings.smtp_password)
-            server.sendmail(
-                settings.email_from,
-                settings.email_recipients,
-                msg.as_string(),
-            )
+        with _smtp_lock:
+            try:
+                _get_smtp().sendmail(
+                    settings.email_from,
+                    settings.email_recipients,
+                    msg.as_string(),
+                )
+            except Exception:
+                _close_smtp()
+                raise
         logger.info(f"Email sent to {settings.email_recipients}")
+        return True
     except Exception as e:
         logger.error(f"Email delivery failed: {e}")
+        return False
 
 
-def _send_teams(report: dict, snapshot: dict, report_path: Path) -> None:
-    """Post an Adaptive Card summary to Microsoft Teams via webhook."""
+def _get_smtp() -> smtplib.SMTP:
+    """
+    Return a logged-in SMTP connection, reusing the previous run's when the
+    server still answers NOOP. Callers must hold _smtp_lock.
+    """
+    global _smtp
+    if _smtp is not None:
+        try:
+            if _smtp.noop()[0] == 250:
+                return _smtp
+        except (smtplib.SMTPException, OSError):
+            pass
+        _close_smtp()
+
+    server = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=SMTP_TIMEOUT)
+    try:
+        server.ehlo()
+        server.starttls(context=ssl.create_default_context())
+        server.login(settings.smtp_user, settings.smtp_password)
+    except Exception:
+        server.close()
+        raise
+    _smtp = server
+    return server
+
+
+def _close_smtp() -> None:
+    """Drop the pooled SMTP connection, if any."""
+    global _smtp
+    if _smtp is None:
+        return
+    try:
+        _smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        pass
+    _smtp = None
+
+
+atexit.register(_close_smtp)
+
+
+def _send_teams(report: dict, snapshot: dict, report_path: Path) -> bool:
+    """Post an Adaptive Card summary to Microsoft Teams via webhook. Returns False if delivery failed."""
     if not settings.teams_webhook_url:
         logger.warning("No Teams webhook configured — skipping Teams notification.")
-        return
+        return True
 
     overall = report.get("overall_status", "error")
-    emoji = STATUS_EMOJI.get(overall, "📋")
-    color = STATUS_COLOR.get(overall, "#6b7280").lstrip("#")
+    status = _status(overall)
+    emoji = STATUS_EMOJIS[status]
+    color = STATUS_COLORS[status].lstrip("#")
 
     facts = snapshot.get("quick_facts", {})
     source_statuses = report.get("source_statuses", {})
@@ -176,7 +351,7 @@ def _send_teams(report: dict, snapshot: dict, report_path: Path) -> None:
 
     # Source status summary line
     src_summary = " | ".join(
-        f"{STATUS_EMOJI.get(v, '❓')} {k.replace('_', ' ').title()}: {v.upper()}"
+        f"{STATUS_EMOJIS[_status(v)]} {k.replace('_', ' ').title()}: {v.upper()}"
         for k, v in source_statuses.items()
     )
 
@@ -218,12 +393,14 @@ def _send_teams(report: dict, snapshot: dict, report_path: Path) -> None:
     }
 
     try:
-        response = requests.post(
+        response = _TEAMS_SESSION.post(
             settings.teams_webhook_url,
             json=payload,
             timeout=10,
         )
         response.raise_for_status()
         logger.info("Teams notification sent successfully.")
+        return True
     except Exception as e:
         logger.error(f"Teams delivery failed: {e}")
+        return False
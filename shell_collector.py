@@ -4,12 +4,20 @@ Runs custom shell health-check scripts and captures their output.
 Scripts should exit 0 for healthy, 1 for warning, 2 for critical.
 Output is captured as plain text and passed to the LLM.
 """
+from __future__ import annotations
+
+import concurrent.futures
+import itertools
 import logging
 import subprocess
+import time
+from collections import Counter
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+import psutil
+
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -17,11 +25,15 @@ logger = logging.getLogger(__name__)
 # Exit code → status mapping
 EXIT_STATUS = {0: "healthy", 1: "warning", 2: "critical"}
 
-# Built-in lightweight checks (no external script needed)
-BUILTIN_CHECKS = [
-    _disk_usage_check,
-    _python_process_check,
-]
+# Upper bound on checks running at once
+MAX_PARALLEL_CHECKS = 8
+
+# Script output kept for the report (stdout + stderr)
+MAX_OUTPUT_BYTES = 2000
+
+# Last full result and when it was taken — see settings.shell_min_interval
+_last_result: dict[str, Any] | None = None
+_last_run_at: float | None = None
 
 
 def collect() -> dict[str, Any]:
@@ -29,51 +41,88 @@ def collect() -> dict[str, Any]:
     Runs all configured shell scripts plus built-in checks.
     Returns structured results for each check.
     """
+    global _last_result, _last_run_at
+    if (
+        _last_result is not None
+        and time.monotonic() - _last_run_at < settings.shell_min_interval
+    ):
+        logger.info("Shell checks ran less than SHELL_MIN_INTERVAL ago — reusing last results.")
+        return _last_result
+
     logger.info("Running shell health checks...")
-    results = []
-
-    # ── Built-in checks ─────────────────────────────────────────
-    for check_fn in BUILTIN_CHECKS:
-        try:
-            results.append(check_fn())
-        except Exception as e:
-            results.append({
-                "name": check_fn.__name__,
-                "status": "error",
-                "output": str(e),
-                "exit_code": -1,
-            })
-
-    # ── External scripts from config ────────────────────────────
-    for script_path in settings.shell_scripts:
-        results.append(_run_script(script_path))
-
-    overall = "healthy"
-    for r in results:
-        if r["status"] == "critical":
-            overall = "critical"
-            break
-        elif r["status"] in ("warning", "error") and overall == "healthy":
-            overall = "warning"
+
+    scripts = _unique_scripts(settings.shell_scripts)
+    workers = min(MAX_PARALLEL_CHECKS, len(BUILTIN_CHECKS) + len(scripts))
+
+    # Checks mostly wait on child processes — run them side by side so the
+    # collector takes as long as the slowest check, not the sum of all of them.
+    # Each task turns its own failures into an error result, so .result() never raises.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        builtin_futures = [executor.submit(_run_builtin, fn) for fn in BUILTIN_CHECKS]
+        script_futures = {p: executor.submit(_run_script, p) for p in _round_robin(scripts)}
+        # Built-in checks first, then scripts in configured order
+        results = [f.result() for f in builtin_futures]
+        results += [script_futures[p].result() for p in scripts]
+
+    counts = Counter(r["status"] for r in results)
+    if counts["critical"]:
+        overall = "critical"
+    elif counts["warning"] or counts["error"]:
+        overall = "warning"
+    else:
+        overall = "healthy"
 
     result = {
         "source": "shell_checks",
         "collected_at": datetime.now(timezone.utc).isoformat(),
         "summary": {
             "total_checks": len(results),
-            "healthy": sum(1 for r in results if r["status"] == "healthy"),
-            "warnings": sum(1 for r in results if r["status"] == "warning"),
-            "critical": sum(1 for r in results if r["status"] == "critical"),
-            "errors": sum(1 for r in results if r["status"] == "error"),
+            "healthy": counts["healthy"],
+            "warnings": counts["warning"],
+            "critical": counts["critical"],
+            "errors": counts["error"],
         },
         "checks": results,
         "status": overall,
     }
 
     logger.info(f"Shell checks: {result['summary']}")
+    _last_result, _last_run_at = result, time.monotonic()
     return result
 
 
+def _unique_scripts(script_paths: list[str]) -> list[str]:
+    """Drop scripts listed more than once (by resolved path), keeping the first spelling."""
+    unique: dict[Path, str] = {}
+    for script_path in script_paths:
+        unique.setdefault(Path(script_path).resolve(), script_path)
+    return list(unique.values())
+
+
+def _round_robin(script_paths: list[str]) -> list[str]:
+    """
+    Interleave scripts across their directories (one from each in turn), so a
+    directory full of slow checks can't hold every worker while others wait.
+    """
+    groups: dict[Path, list[str]] = {}
+    for script_path in script_paths:
+        groups.setdefault(Path(script_path).parent, []).append(script_path)
+    return [p for batch in itertools.zip_longest(*groups.values()) for p in batch if p is not None]
+
+
+def _run_builtin(check_fn) -> dict:
+    """Run a built-in check, turning an unexpected exception into an error result."""
+    try:
+        return check_fn()
+    except Exception as e:
+        return {
+            "name": check_fn.__name__,
+            "status": "error",
+            "output": str(e),
+            "exit_code": -1,
+        }
+
+
 def _run_script(script_path: str) -> dict:
     """Execute a shell script and capture output + exit code."""
     path = Path(script_path)
@@ -92,18 +141,18 @@ def _run_script(script_path: str) -> dict:
         proc = subprocess.run(
             [str(path)],
             capture_output=True,
-            text=True,
             timeout=30,
             shell=False,
         )
         status = EXIT_STATUS.get(proc.returncode, "critical")
-        output = (proc.stdout + proc.stderr).strip()
+        # Cap output length before decoding — verbose scripts can emit megabytes
+        output = (proc.stdout + proc.stderr)[:MAX_OUTPUT_BYTES].decode("utf-8", errors="replace").strip()
 
         return {
             "name": name,
             "script": script_path,
             "status": status,
-            "output": output[:2000],  # cap output length
+            "output": output,
             "exit_code": proc.returncode,
         }
 
@@ -118,22 +167,14 @@ def _run_script(script_path: str) -> dict:
 def _disk_usage_check() -> dict:
     """Built-in: check disk usage on key mount points."""
     try:
-        proc = subprocess.run(
-            ["df", "-h", "--output=target,pcent"],
-            capture_output=True, text=True, timeout=10,
-        )
-        lines = proc.stdout.strip().split("\n")[1:]  # skip header
         high_usage = []
-        for line in lines:
-            parts = line.split()
-            if len(parts) == 2:
-                mount, pct = parts
-                try:
-                    usage = int(pct.replace("%", ""))
-                    if usage >= 90:
-                        high_usage.append(f"{mount}: {pct}")
-                except ValueError:
-                    pass
+        for part in psutil.disk_partitions(all=False):
+            try:
+                usage = psutil.disk_usage(part.mountpoint).percent
+            except OSError:
+                continue  # unreadable or vanished mount
+            if usage >= 90:
+                high_usage.append(f"{part.mountpoint}: {usage:.1f}%")
 
         status = "critical" if high_usage else "healthy"
         output = (
@@ -148,12 +189,19 @@ def _disk_usage_check() -> dict:
 def _python_process_check() -> dict:
     """Built-in: verify key Python processes are running."""
     try:
-        proc = subprocess.run(
-            ["pgrep", "-a", "-f", "python"],
-            capture_output=True, text=True, timeout=10,
+        # Same match as `pgrep -f python`: "python" anywhere in the full command line
+        running = sum(
+            1 for p in psutil.process_iter(["cmdline"])
+            if "python" in " ".join(p.info["cmdline"] or [])
         )
-        running = proc.stdout.strip().split("\n") if proc.stdout.strip() else []
-        output = f"{len(running)} Python process(es) running"
+        output = f"{running} Python process(es) running"
         return {"name": "python_process_check", "status": "healthy", "output": output, "exit_code": 0}
     except Exception as e:
         return {"name": "python_process_check", "status": "error", "output": str(e), "exit_code": -1}
+
+
+# Built-in lightweight checks (no external script needed)
+BUILTIN_CHECKS = [
+    _disk_usage_check,
+    _python_process_check,
+]